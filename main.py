@@ -1,12 +1,75 @@
-import csv
 import time
+
+# Момент загрузки модуля - от него считаем время запуска CLI
+_STARTUP_STARTED = time.perf_counter()
+
+import argparse
+import contextlib
+import csv
+import gzip
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import re
+import sys
+import threading
 from datetime import datetime, timedelta
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+
+# Selenium импортируется лениво - только на путях, где нужен браузер
+
+DEFAULT_URL = "https://n729879.yclients.com/company/929887/personal/select-services?o="
+
+DEFAULT_SETTINGS = {
+    "headless": True,
+    "fast_mode": True,
+    "output": "price_list.csv",
+    "page_timeout": None,
+    "batch_size": None,
+    "archive_dir": None,
+    "compression": "auto",
+    "profile": "default",
+    "memory_budget_mb": None,
+    "cpu_budget_percent": None,
+    "restart_low": True,
+}
+
+# Профили запуска Chrome: размер окна и дополнительные аргументы
+LAUNCH_PROFILES = {
+    "default": {
+        "window_size": "1920,1080",
+        "arguments": [],
+    },
+    "low": {
+        "window_size": "1280,800",
+        "arguments": [
+            "--renderer-process-limit=1",  # Один процесс рендерера
+            "--process-per-site",
+            "--js-flags=--max-old-space-size=256",  # Лимит кучи JS, МБ
+            "--disk-cache-size=1048576",
+            "--disable-background-networking",
+        ],
+    },
+}
+
+# Селекторы названия услуги в карточке (в порядке приоритета)
+SERVICE_NAME_SELECTORS = [".title-block__title", ".service-title", "h3", "h4"]
+
+CSV_FIELDS = ["category", "service", "duration", "description", "price"]
+SOURCE_CSV_FIELDS = ["source", *CSV_FIELDS]
+SNAPSHOT_CSV_FIELDS = ["snapshot", "captured_at", "url", *CSV_FIELDS]
+
+
+class By:
+    """Стратегии поиска элементов (значения совпадают с selenium By)
+
+    Объявлены здесь, чтобы офлайн-команды не импортировали selenium.
+    """
+
+    CSS_SELECTOR = "css selector"
+    TAG_NAME = "tag name"
+    CLASS_NAME = "class name"
 
 
 class Timer:
@@ -41,26 +104,407 @@ class Timer:
             return f"{hours}ч {minutes}м {secs:.1f}с"
 
 
+class ResourceGovernor:
+    """Учет RSS и CPU процессов chromedriver и Chrome с контролем бюджетов
+
+    Замеры делает фоновый поток, поэтому пики ловятся и во время
+    блокирующих вызовов драйвера. Требует psutil.
+    """
+
+    def __init__(
+        self,
+        memory_budget_mb=None,
+        cpu_budget_percent=None,
+        interval=1.0,
+        throttle_delay=0.5,
+        cpu_throttle_rate=2,
+    ):
+        self.memory_budget_mb = memory_budget_mb
+        self.cpu_budget_percent = cpu_budget_percent
+        self.interval = interval
+        self.throttle_delay = throttle_delay
+        self.cpu_throttle_rate = cpu_throttle_rate
+
+        self.current_rss_mb = 0.0
+        self.current_cpu_percent = 0.0
+        self.peak_rss_mb = 0.0
+        self.peak_cpu_percent = 0.0
+        self.samples = 0
+        self.throttles = 0
+        self.restarts = 0
+        self.last_gc_time = 0.0
+
+        self.root_pid = None
+        self.processes = {}
+        self.thread = None
+        self.stop_event = threading.Event()
+
+    @staticmethod
+    def is_available():
+        try:
+            import psutil
+        except ImportError:
+            return False
+        return True
+
+    def attach(self, pid):
+        """Начать наблюдение за деревом процессов драйвера"""
+        self.detach()
+        self.root_pid = pid
+        self.processes = {}
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.sample_loop, daemon=True)
+        self.thread.start()
+
+    def detach(self):
+        """Остановить наблюдение (пиковые значения сохраняются)"""
+        if self.thread:
+            self.stop_event.set()
+            self.thread.join()
+            self.thread = None
+
+    def sample_loop(self):
+        while not self.stop_event.is_set():
+            self.sample()
+            self.stop_event.wait(self.interval)
+
+    def sample(self):
+        """Один замер суммарных RSS и CPU по дереву процессов"""
+        import psutil
+
+        try:
+            root = psutil.Process(self.root_pid)
+            tree = [root, *root.children(recursive=True)]
+        except psutil.Error:
+            return
+
+        rss = 0
+        cpu = 0.0
+        alive = {}
+        for process in tree:
+            # cpu_percent считает от предыдущего вызова - храним объекты процессов
+            process = self.processes.get(process.pid, process)
+            try:
+                rss += process.memory_info().rss
+                cpu += process.cpu_percent(None)
+            except psutil.Error:
+                continue
+            alive[process.pid] = process
+        self.processes = alive
+
+        self.current_rss_mb = rss / (1024 * 1024)
+        self.current_cpu_percent = cpu
+        self.peak_rss_mb = max(self.peak_rss_mb, self.current_rss_mb)
+        self.peak_cpu_percent = max(self.peak_cpu_percent, cpu)
+        self.samples += 1
+
+    def over_memory_budget(self):
+        return (
+            bool(self.memory_budget_mb) and self.current_rss_mb > self.memory_budget_mb
+        )
+
+    def over_cpu_budget(self):
+        return (
+            bool(self.cpu_budget_percent)
+            and self.current_cpu_percent > self.cpu_budget_percent
+        )
+
+    def checkpoint(self):
+        """Притормозить клиент, если превышен бюджет CPU
+
+        Пауза замедляет только Python-клиент: Chrome в это время продолжает
+        работать. Сам браузер замедляет PriceListParser.resource_checkpoint
+        через CDP Emulation.setCPUThrottlingRate.
+        """
+        if self.over_cpu_budget():
+            self.throttles += 1
+            time.sleep(self.throttle_delay)
+            return True
+        return False
+
+    def should_collect_garbage(self, min_interval=5.0):
+        """Не чаще раза в min_interval секунд"""
+        now = time.time()
+        if now - self.last_gc_time < min_interval:
+            return False
+        self.last_gc_time = now
+        return True
+
+    def report(self):
+        print(f"🧠 Пик памяти Chrome: {self.peak_rss_mb:.1f} МБ")
+        print(f"🔥 Пик CPU Chrome: {self.peak_cpu_percent:.1f}%")
+        if self.throttles or self.restarts:
+            print(
+                f"🐢 Притормаживаний: {self.throttles}, перезапусков: {self.restarts}"
+            )
+
+
+class SnapshotArchive:
+    """Архив снимков page_source со сжатием и адресацией по содержимому
+
+    Структура каталога:
+        index.jsonl - метаданные снимков, по одной записи на строку
+        objects/ab/<sha256>.html.zst (или .html.gz) - сжатый HTML
+    """
+
+    EXTENSIONS = {"zstd": ".html.zst", "gzip": ".html.gz"}
+
+    def __init__(self, root, compression="auto"):
+        self.root = root
+        self.index_path = os.path.join(root, "index.jsonl")
+        self.compression = self.resolve_compression(compression)
+
+    @classmethod
+    def resolve_compression(cls, compression):
+        """zstd, если установлен zstandard, иначе gzip"""
+        if compression == "auto":
+            try:
+                import zstandard
+            except ImportError:
+                return "gzip"
+            return "zstd"
+        if compression not in cls.EXTENSIONS:
+            raise ValueError(f"Неизвестный формат сжатия: {compression}")
+        return compression
+
+    def object_path(self, digest, compression):
+        return os.path.join(
+            self.root, "objects", digest[:2], digest + self.EXTENSIONS[compression]
+        )
+
+    def find_object(self, digest):
+        for compression in self.EXTENSIONS:
+            path = self.object_path(digest, compression)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def save(self, page_source, **metadata):
+        """Сохранить снимок. Одинаковый HTML хранится один раз"""
+        raw = page_source.encode("utf-8")
+        digest = hashlib.sha256(raw).hexdigest()
+
+        path = self.find_object(digest)
+        is_new = path is None
+        if is_new:
+            path = self.object_path(digest, self.compression)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "wb") as snapshot_file:
+                snapshot_file.write(self.compress(raw, self.compression))
+            os.replace(tmp_path, path)
+
+        record = {
+            "sha256": digest,
+            "object": os.path.relpath(path, self.root),
+            "size": len(raw),
+            "captured_at": datetime.now().isoformat(timespec="seconds"),
+            **metadata,
+        }
+        with open(self.index_path, "a", encoding="utf-8") as index_file:
+            index_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        return record, is_new
+
+    def records(self):
+        """Записи индекса в порядке добавления
+
+        Поврежденные строки (например, недописанная при аварийной остановке)
+        пропускаются с предупреждением.
+        """
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path, encoding="utf-8") as index_file:
+            for line_number, line in enumerate(index_file, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    record = None
+                if not isinstance(record, dict) or not (
+                    record.get("sha256") and record.get("object")
+                ):
+                    print(f"⚠️ {self.index_path}:{line_number}: поврежденная запись")
+                    continue
+                yield record
+
+    @staticmethod
+    def compress(raw, compression):
+        if compression == "zstd":
+            import zstandard
+
+            return zstandard.ZstdCompressor(level=10).compress(raw)
+        return gzip.compress(raw, compresslevel=6)
+
+    @staticmethod
+    def read_page_source(path):
+        """Прочитать снимок или обычный HTML файл"""
+        with open(path, "rb") as snapshot_file:
+            raw = snapshot_file.read()
+        if path.endswith(".zst"):
+            import zstandard
+
+            raw = zstandard.ZstdDecompressor().decompressobj().decompress(raw)
+        elif path.endswith(".gz"):
+            raw = gzip.decompress(raw)
+        return raw.decode("utf-8")
+
+
+class HtmlElement:
+    """Обертка над узлом BeautifulSoup с интерфейсом WebElement
+
+    Позволяет применять те же методы извлечения к сохраненному page_source
+    без запуска браузера.
+    """
+
+    # fmt: off
+    BLOCK_TAGS = {
+        "address", "article", "aside", "blockquote", "br", "dd", "div", "dl",
+        "dt", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6", "header",
+        "hr", "li", "main", "nav", "ol", "p", "pre", "section", "table", "td",
+        "th", "tr", "ul",
+    }
+    # fmt: on
+    SKIP_TAGS = {"script", "style", "template", "noscript", "head", "title"}
+
+    def __init__(self, node):
+        self.node = node
+
+    @classmethod
+    def from_page_source(cls, page_source):
+        try:
+            from bs4 import BeautifulSoup
+        except ImportError:
+            raise RuntimeError(
+                "Для офлайн-разбора установите beautifulsoup4: pip install beautifulsoup4"
+            )
+        return cls(BeautifulSoup(page_source, "html.parser"))
+
+    @property
+    def text(self):
+        """Текст узла с переносами строк между блочными элементами"""
+        chunks = []
+        self.collect_text(self.node, chunks)
+        lines = (" ".join(line.split()) for line in "".join(chunks).split("\n"))
+        return "\n".join(line for line in lines if line)
+
+    @classmethod
+    def collect_text(cls, node, chunks):
+        from bs4 import Comment, NavigableString
+
+        for child in node.children:
+            if isinstance(child, NavigableString):
+                if not isinstance(child, Comment):
+                    chunks.append(str(child))
+            elif child.name not in cls.SKIP_TAGS:
+                is_block = child.name in cls.BLOCK_TAGS
+                if is_block:
+                    chunks.append("\n")
+                cls.collect_text(child, chunks)
+                if is_block:
+                    chunks.append("\n")
+
+    @staticmethod
+    def to_css(by, value):
+        if by == By.CSS_SELECTOR:
+            return value
+        if by == By.CLASS_NAME:
+            return f".{value}"
+        if by == By.TAG_NAME:
+            return value
+        raise ValueError(f"Неподдерживаемая стратегия поиска: {by}")
+
+    def find_elements(self, by, value):
+        return [HtmlElement(node) for node in self.node.select(self.to_css(by, value))]
+
+    def find_element(self, by, value):
+        node = self.node.select_one(self.to_css(by, value))
+        if node is None:
+            raise LookupError(f"Элемент не найден: {value}")
+        return HtmlElement(node)
+
+    @staticmethod
+    def drop_nested(cards, name_selector):
+        """Оставить самые вложенные карточки, в которых есть название услуги
+
+        Returns:
+            tuple: (оставленные карточки, число отброшенных карточек с названием)
+        """
+        named = [card for card in cards if card.node.select_one(name_selector)]
+        ancestor_ids = {id(parent) for card in named for parent in card.node.parents}
+        innermost = [card for card in named if id(card.node) not in ancestor_ids]
+        return innermost, len(named) - len(innermost)
+
+
 class PriceListParser:
-    def __init__(self, headless=True, fast_mode=True):
+    def __init__(
+        self,
+        headless=True,
+        fast_mode=True,
+        url=None,
+        page_timeout=None,
+        batch_size=None,
+        archive_dir=None,
+        compression="auto",
+        profile="default",
+        memory_budget_mb=None,
+        cpu_budget_percent=None,
+        restart_low=True,
+        start_driver=True,
+    ):
         """
         Инициализация парсера
 
         Args:
             headless (bool): Запуск браузера в фоновом режиме
             fast_mode (bool): Включить режим быстрого парсинга
+            url (str): Адрес страницы с услугами (по умолчанию DEFAULT_URL)
+            page_timeout (int): Таймаут ожидания контейнеров, сек
+            batch_size (int): Размер пакета контейнеров при парсинге
+            archive_dir (str): Каталог архива снимков page_source
+            compression (str): Сжатие снимков: auto, zstd или gzip
+            profile (str): Профиль запуска Chrome из LAUNCH_PROFILES
+            memory_budget_mb (int): Бюджет RSS Chrome, МБ
+            cpu_budget_percent (int): Бюджет CPU Chrome, %
+            restart_low (bool): Один раз перезапустить браузер в профиле low,
+                если загруженная страница превысила бюджет памяти
+            start_driver (bool): Запускать браузер (False - офлайн-разбор)
         """
-        self.url = (
-            "https://n729879.yclients.com/company/929887/personal/select-services?o="
-        )
+        if profile not in LAUNCH_PROFILES:
+            raise ValueError(f"Неизвестный профиль запуска: {profile}")
+
+        self.url = url or DEFAULT_URL
+        self.headless = headless
+        self.profile = profile
+        self.restart_low = restart_low
         self.driver = None
         self.data = []
         self.fast_mode = fast_mode
+        self.page_timeout = page_timeout
+        self.batch_size = batch_size
+        self.archive = (
+            SnapshotArchive(archive_dir, compression) if archive_dir else None
+        )
+        # Индекс дедупликации: хэши нормализованных ключей уже добавленных услуг
+        self.seen_keys = set()
+        self.duplicates_by_container = {}
+        self.nested_by_container = {}
         self.total_timer = Timer("Общее время парсинга")
-        self.setup_driver(headless)
+        self.governor = None
+        self.cpu_throttled = False
+        if start_driver:
+            if ResourceGovernor.is_available():
+                self.governor = ResourceGovernor(memory_budget_mb, cpu_budget_percent)
+            else:
+                print("⚠️ psutil не установлен - пик памяти и бюджеты не отслеживаются")
+            self.setup_driver(headless)
 
     def setup_driver(self, headless=True):
         """Настройка веб-драйвера Chrome с оптимизациями"""
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
+
         setup_timer = Timer("Настройка драйвера")
         setup_timer.start()
 
@@ -99,7 +543,10 @@ class PriceListParser:
             }
             chrome_options.add_experimental_option("prefs", prefs)
 
-        chrome_options.add_argument("--window-size=1920,1080")
+        launch_profile = LAUNCH_PROFILES[self.profile]
+        for argument in launch_profile["arguments"]:
+            chrome_options.add_argument(argument)
+        chrome_options.add_argument(f"--window-size={launch_profile['window_size']}")
         chrome_options.add_argument(
             "--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
         )
@@ -117,19 +564,65 @@ class PriceListParser:
             wait_time = 3 if self.fast_mode else 5
             self.driver.implicitly_wait(wait_time)
 
+            self.cpu_throttled = False
+            if self.governor:
+                self.governor.attach(self.driver.service.process.pid)
+
             setup_timer.stop()
         except Exception as e:
             print(f"Ошибка при инициализации драйвера: {e}")
             print("Убедитесь, что ChromeDriver установлен и доступен в PATH")
             raise
 
+    def restart_driver(self):
+        """Перезапуск браузера с текущим профилем запуска"""
+        self.governor.restarts += 1
+        self.governor.detach()
+        try:
+            self.driver.quit()
+        except Exception:
+            pass
+        self.driver = None
+        self.setup_driver(self.headless)
+
+    def resource_checkpoint(self):
+        """Контроль бюджетов ресурсов в безопасных точках парсинга"""
+        if not self.governor:
+            return
+
+        governor = self.governor
+        over_cpu = governor.checkpoint()
+        if over_cpu != self.cpu_throttled:
+            # Замедляем сам рендерер, пока CPU выше бюджета, затем снимаем лимит
+            rate = governor.cpu_throttle_rate if over_cpu else 1
+            try:
+                self.driver.execute_cdp_cmd(
+                    "Emulation.setCPUThrottlingRate", {"rate": rate}
+                )
+                self.cpu_throttled = over_cpu
+            except Exception:
+                pass
+
+        if governor.over_memory_budget() and governor.should_collect_garbage():
+            # Просим V8 собрать мусор, пока до перезапуска дело не дошло
+            try:
+                self.driver.execute_cdp_cmd("HeapProfiler.collectGarbage", {})
+            except Exception:
+                pass
+
     def wait_for_page_load(self, timeout=30):
         """Оптимизированное ожидание загрузки страницы"""
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.common.exceptions import TimeoutException
+
         load_timer = Timer("Загрузка страницы")
         load_timer.start()
 
         # Уменьшаем timeout для быстрого режима
-        if self.fast_mode:
+        if self.page_timeout:
+            timeout = self.page_timeout
+        elif self.fast_mode:
             timeout = 20
 
         try:
@@ -192,6 +685,7 @@ class PriceListParser:
             # Периодически делаем паузу для загрузки контента
             if scroll_count % pause_every == 0:
                 time.sleep(pause_duration)
+                self.resource_checkpoint()
 
             # Проверяем высоту документа
             new_height = self.driver.execute_script("return document.body.scrollHeight")
@@ -259,6 +753,7 @@ class PriceListParser:
                 break
 
             time.sleep(0.5 if self.fast_mode else 1.0)
+            self.resource_checkpoint()
 
         content_timer.stop()
         return previous_count
@@ -271,17 +766,38 @@ class PriceListParser:
         # Дополнительное ожидание динамического контента
         container_count = self.wait_for_dynamic_content()
 
+        # Снимок делаем после догрузки контейнеров: в архиве тот же DOM, что парсим
+        if self.archive:
+            self.archive_snapshot()
+
         # Находим все контейнеры одним запросом
         containers_timer = Timer("Поиск контейнеров")
         containers_timer.start()
 
-        containers = self.driver.find_elements(
+        containers = self.find_containers(self.driver)
+
+        containers_timer.stop()
+
+        result = self.parse_containers(containers)
+        parse_timer.stop()
+        return result
+
+    def parse_page_source(self, page_source):
+        """Разбор сохраненного HTML страницы без браузера"""
+        root = HtmlElement.from_page_source(page_source)
+        return self.parse_containers(self.find_containers(root))
+
+    def find_containers(self, root):
+        """Поиск контейнеров категорий в драйвере или офлайн-документе"""
+        containers = root.find_elements(
             By.CSS_SELECTOR, ".inner-container.ng-star-inserted"
         )
         if not containers:
-            containers = self.driver.find_elements(By.CLASS_NAME, "inner-container")
+            containers = root.find_elements(By.CLASS_NAME, "inner-container")
+        return containers
 
-        containers_timer.stop()
+    def parse_containers(self, containers):
+        """Пакетная обработка найденных контейнеров"""
         print(f"Найдено контейнеров для парсинга: {len(containers)}")
 
         if len(containers) == 0:
@@ -292,7 +808,7 @@ class PriceListParser:
         processed_containers = 0
 
         # Уменьшаем размер пакета для лучшего контроля
-        batch_size = 10 if self.fast_mode else 5
+        batch_size = self.batch_size or (10 if self.fast_mode else 5)
 
         print(f"\n🔄 Начинаем обработку {len(containers)} контейнеров...")
         print("=" * 50)
@@ -331,7 +847,7 @@ class PriceListParser:
 
                     # Ускоренное извлечение услуг
                     services = self.extract_services_from_container(
-                        container, category_name
+                        container, category_name, container_index
                     )
 
                     service_count = len(services)
@@ -339,7 +855,14 @@ class PriceListParser:
                     total_services += service_count
                     processed_containers += 1
 
-                    print(f" ✅ {category_name} ({service_count} услуг)")
+                    details = f"{service_count} услуг"
+                    duplicates = self.duplicates_by_container.get(container_index, 0)
+                    if duplicates:
+                        details += f", дублей отброшено: {duplicates}"
+                    nested = self.nested_by_container.get(container_index, 0)
+                    if nested:
+                        details += f", вложенных карточек: {nested}"
+                    print(f" ✅ {category_name} ({details})")
 
                 except Exception as e:
                     print(f" ❌ Ошибка: {str(e)[:50]}...")
@@ -348,6 +871,7 @@ class PriceListParser:
                     continue
 
             batch_timer.stop()
+            self.resource_checkpoint()
             print(f"  📊 Пакет завершен: {batch_services} услуг добавлено")
 
             # Показываем общий прогресс
@@ -357,8 +881,10 @@ class PriceListParser:
         print("\n" + "=" * 50)
         print(f"✅ Обработано контейнеров: {processed_containers}")
         print(f"📋 Всего извлечено услуг: {total_services}")
+        print(f"♻️ Отброшено дублей: {sum(self.duplicates_by_container.values())}")
+        total_nested = sum(self.nested_by_container.values())
+        print(f"🪆 Пропущено вложенных карточек: {total_nested}")
 
-        parse_timer.stop()
         return len(self.data) > 0
 
     def extract_category_from_container(self, container):
@@ -384,8 +910,10 @@ class PriceListParser:
 
         return None
 
-    def extract_services_from_container(self, container, category_name):
-        """Оптимизированное извлечение услуг"""
+    def extract_services_from_container(
+        self, container, category_name, container_index=None
+    ):
+        """Оптимизированное извлечение услуг с отбрасыванием дублей"""
         services = []
 
         # Быстрый поиск карточек с расширенными селекторами
@@ -409,17 +937,95 @@ class PriceListParser:
                 By.CSS_SELECTOR, "div[class*='card']"
             )
 
+        # Обертки над несколькими карточками и карточки-поля дают лишние строки:
+        # оставляем самые вложенные карточки с названием услуги
+        if len(service_cards) > 1:
+            service_cards, nested = self.drop_nested_cards(service_cards)
+            if nested and container_index is not None:
+                self.nested_by_container[container_index] = (
+                    self.nested_by_container.get(container_index, 0) + nested
+                )
+
+        duplicates = 0
         for card in service_cards:
             try:
                 service_data = self.extract_service_data_from_card(card, category_name)
                 if service_data:
+                    if not self.register_service(service_data):
+                        duplicates += 1
+                        continue
                     services.append(service_data)
                     self.data.append(service_data)
             except:
                 continue
 
+        if duplicates and container_index is not None:
+            self.duplicates_by_container[container_index] = (
+                self.duplicates_by_container.get(container_index, 0) + duplicates
+            )
+
         return services
 
+    def reset_dedup(self):
+        """Очистить индекс дедупликации и счетчики дублей"""
+        self.seen_keys = set()
+        self.duplicates_by_container = {}
+        self.nested_by_container = {}
+
+    def drop_nested_cards(self, cards):
+        """Оставить самые вложенные карточки, в которых есть название услуги
+
+        Карточка-обертка над другими карточками с названием отбрасывается,
+        карточки без названия (поля цены, времени) строк не дают вовсе.
+
+        Returns:
+            tuple: (оставленные карточки, число отброшенных карточек с названием)
+        """
+        name_selector = ", ".join(SERVICE_NAME_SELECTORS)
+        if isinstance(cards[0], HtmlElement):
+            return HtmlElement.drop_nested(cards, name_selector)
+
+        try:
+            # Одна проверка в браузере вместо попарных запросов к драйверу
+            result = self.driver.execute_script(
+                """
+                const cards = arguments[0];
+                const nameSelector = arguments[1];
+                const named = cards.filter((card) => card.querySelector(nameSelector));
+                const innermost = named.filter(
+                    (card) => !named.some((other) => other !== card && card.contains(other))
+                );
+                return [innermost, named.length - innermost.length];
+                """,
+                cards,
+                name_selector,
+            )
+            if result is None:
+                return cards, 0
+            innermost, nested = result
+            return innermost, nested
+        except:
+            return cards, 0
+
+    @staticmethod
+    def make_dedup_key(service_data):
+        """Хэш нормализованного ключа (категория, услуга, цена, длительность)"""
+        parts = []
+        for field in ("category", "service", "price", "duration"):
+            value = service_data.get(field) or ""
+            parts.append(" ".join(value.split()).casefold())
+        return hashlib.blake2b(
+            "\x1f".join(parts).encode("utf-8"), digest_size=16
+        ).digest()
+
+    def register_service(self, service_data):
+        """Добавить услугу в индекс дедупликации. False - если это дубль"""
+        key = self.make_dedup_key(service_data)
+        if key in self.seen_keys:
+            return False
+        self.seen_keys.add(key)
+        return True
+
     def extract_service_data_from_card(self, card, category_name):
         """Оптимизированное извлечение данных из карточки с правильной классификацией"""
         try:
@@ -430,9 +1036,7 @@ class PriceListParser:
 
             # 1. НАЗВАНИЕ УСЛУГИ - приоритетные селекторы
             service_name = ""
-            name_selectors = [".title-block__title", ".service-title", "h3", "h4"]
-
-            for selector in name_selectors:
+            for selector in SERVICE_NAME_SELECTORS:
                 try:
                     element = card.find_element(By.CSS_SELECTOR, selector)
                     if element and element.text.strip():
@@ -450,8 +1054,6 @@ class PriceListParser:
             price = ""
 
             # 2. УЛУЧШЕННЫЕ ПАТТЕРНЫ ДЛЯ ТОЧНОЙ КЛАССИФИКАЦИИ
-            import re
-
             # Более строгие паттерны для цен
             price_patterns = [
                 r"^\d+\s*[-–—]\s*\d+\s*[₽руб]",  # 1000-2000₽
@@ -591,7 +1193,7 @@ class PriceListParser:
         except Exception as e:
             return None
 
-    def save_to_csv(self, filename="price_list.csv"):
+    def save_to_csv(self, filename="price_list.csv", fieldnames=CSV_FIELDS):
         """Сохранение данных в CSV файл"""
         save_timer = Timer("Сохранение в CSV")
         save_timer.start()
@@ -602,7 +1204,6 @@ class PriceListParser:
 
         try:
             with open(filename, "w", newline="", encoding="utf-8") as csvfile:
-                fieldnames = ["category", "service", "duration", "description", "price"]
                 writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
 
                 writer.writeheader()
@@ -618,6 +1219,12 @@ class PriceListParser:
             print(f"Ошибка при сохранении: {e}")
             return False
 
+    def load_from_csv(self, filename):
+        """Загрузка ранее сохраненных данных из CSV файла"""
+        with open(filename, newline="", encoding="utf-8") as csvfile:
+            self.data.extend(csv.DictReader(csvfile))
+        return len(self.data)
+
     def show_parsing_stats(self):
         """Показать статистику парсинга"""
         if not self.data:
@@ -647,20 +1254,79 @@ class PriceListParser:
         print(f"Услуг с ценами: {with_prices}")
         print(f"Услуг без цен: {len(self.data) - with_prices}")
 
-    def run(self, output_file="price_list.csv", debug=False):
-        """Основной метод запуска парсера с измерением времени"""
-        self.total_timer.start()
+        # Отброшенные дубли и вложенные карточки по контейнерам
+        if self.duplicates_by_container:
+            total_duplicates = sum(self.duplicates_by_container.values())
+            print(f"Отброшено дублей: {total_duplicates}")
+            for index, count in sorted(self.duplicates_by_container.items()):
+                print(f"  - контейнер {index + 1}: {count}")
+        if self.nested_by_container:
+            total_nested = sum(self.nested_by_container.values())
+            print(f"Пропущено вложенных карточек: {total_nested}")
+            for index, count in sorted(self.nested_by_container.items()):
+                print(f"  - контейнер {index + 1}: {count}")
+
+    def archive_snapshot(self):
+        """Сохранить отрендеренную страницу в архив снимков"""
+        archive_timer = Timer("Архивирование снимка")
+        archive_timer.start()
 
         try:
-            print(f"🚀 Режим парсинга: {'БЫСТРЫЙ' if self.fast_mode else 'ОБЫЧНЫЙ'}")
-            print(f"Загружаем страницу: {self.url}")
+            record, is_new = self.archive.save(
+                self.driver.page_source, url=self.url, fast_mode=self.fast_mode
+            )
+            status = "новый" if is_new else "уже в архиве"
+            print(f"🗄️ Снимок {record['sha256'][:12]} ({status}): {record['object']}")
+        except Exception as e:
+            print(f"⚠️ Не удалось сохранить снимок: {e}")
+
+        archive_timer.stop()
 
+    def load_page(self):
+        """Загрузка страницы с перезапуском сессии при превышении бюджета памяти
+
+        Бюджет проверяется один раз, после загрузки и прокрутки: если он
+        превышен и разрешен restart_low, браузер один раз перезапускается
+        в профиле low (повтор в том же профиле снова превысил бы бюджет).
+        Во время парсинга контейнеров превышение памяти приводит только
+        к запросу сборки мусора в resource_checkpoint.
+        """
+        while True:
             page_load_timer = Timer("Загрузка страницы")
             page_load_timer.start()
             self.driver.get(self.url)
             page_load_timer.stop()
 
             if not self.wait_for_page_load():
+                return False
+
+            if not (self.governor and self.governor.over_memory_budget()):
+                return True
+
+            rss_mb = self.governor.current_rss_mb
+            budget_mb = self.governor.memory_budget_mb
+            if not self.restart_low or self.profile == "low":
+                print(
+                    f"⚠️ RSS {rss_mb:.0f} МБ больше бюджета {budget_mb} МБ, продолжаем"
+                )
+                return True
+
+            print(
+                f"♻️ RSS {rss_mb:.0f} МБ больше бюджета {budget_mb} МБ - "
+                "перезапуск в профиле low"
+            )
+            self.profile = "low"
+            self.restart_driver()
+
+    def run(self, output_file="price_list.csv", debug=False):
+        """Основной метод запуска парсера с измерением времени"""
+        self.total_timer.start()
+
+        try:
+            print(f"🚀 Режим парсинга: {'БЫСТРЫЙ' if self.fast_mode else 'ОБЫЧНЫЙ'}")
+            print(f"Загружаем страницу: {self.url}")
+
+            if not self.load_page():
                 print("Не удалось дождаться загрузки страницы")
                 return False
 
@@ -690,11 +1356,383 @@ class PriceListParser:
             return False
 
         finally:
+            # Пики нужны и для неудачных запусков
+            if self.governor:
+                self.governor.detach()
+                self.governor.report()
             if self.driver:
                 self.driver.quit()
 
 
-def main():
+def load_config(path):
+    """Загрузка конфигурации из TOML или YAML файла"""
+    if not path:
+        return {}
+
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".toml":
+        try:
+            import tomllib
+        except ImportError:
+            import tomli as tomllib
+        with open(path, "rb") as config_file:
+            config = tomllib.load(config_file)
+    elif extension in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError:
+            raise RuntimeError(
+                "Для YAML-конфигов установите PyYAML: pip install pyyaml"
+            )
+        with open(path, encoding="utf-8") as config_file:
+            try:
+                config = yaml.safe_load(config_file) or {}
+            except yaml.YAMLError as e:
+                raise ValueError(f"Некорректный YAML в {path}: {e}")
+    else:
+        raise ValueError(f"Неподдерживаемый формат конфига: {path}")
+
+    if not isinstance(config, dict):
+        raise ValueError(f"Конфиг должен быть словарем: {path}")
+    return config
+
+
+def resolve_settings(config, args, overrides=None):
+    """Настройки: по умолчанию < конфиг < настройки цели < командная строка"""
+    settings = dict(DEFAULT_SETTINGS)
+    settings.update(config.get("scraper") or {})
+    settings.update(overrides or {})
+    for key in DEFAULT_SETTINGS:
+        value = getattr(args, key, None)
+        if value is not None:
+            settings[key] = value
+
+    if settings["profile"] not in LAUNCH_PROFILES:
+        raise ValueError(f"Неизвестный профиль запуска: {settings['profile']}")
+    compression = settings["compression"]
+    if compression != "auto" and compression not in SnapshotArchive.EXTENSIONS:
+        raise ValueError(f"Неизвестный формат сжатия: {compression}")
+    return settings
+
+
+def run_target(settings, url, output_file):
+    """Запуск парсера для одной страницы"""
+    parser = PriceListParser(
+        headless=settings["headless"],
+        fast_mode=settings["fast_mode"],
+        url=url,
+        page_timeout=settings["page_timeout"],
+        batch_size=settings["batch_size"],
+        archive_dir=settings["archive_dir"],
+        compression=settings["compression"],
+        profile=settings["profile"],
+        memory_budget_mb=settings["memory_budget_mb"],
+        cpu_budget_percent=settings["cpu_budget_percent"],
+        restart_low=settings["restart_low"],
+    )
+    return parser.run(output_file=output_file)
+
+
+def command_scrape(args, config, settings):
+    targets = config.get("targets") or []
+    output_file = args.output
+    if args.url:
+        url = args.url
+    elif targets and targets[0].get("url"):
+        # Файл первой цели берем, только если и адрес взят из нее
+        url = targets[0]["url"]
+        output_file = output_file or targets[0].get("output")
+    else:
+        url = DEFAULT_URL
+    output_file = output_file or settings["output"]
+
+    success = run_target(settings, url, output_file)
+    if success:
+        print(f"\n✅ Парсинг завершен успешно!")
+        print(f"📁 Проверьте файл {output_file}")
+        return 0
+
+    print(f"\n❌ Парсинг завершился с ошибками")
+    return 1
+
+
+def command_batch(args, config, settings):
+    targets = config.get("targets") or []
+    if not targets:
+        print("В конфиге нет списка targets")
+        return 2
+
+    failed = []
+    for index, target in enumerate(targets, start=1):
+        url = target.get("url")
+        if not url:
+            print(f"⚠️ Цель {index}: не указан url, пропускаем")
+            failed.append(index)
+            continue
+
+        output_file = target.get("output") or f"price_list_{index}.csv"
+        print(f"\n=== ЦЕЛЬ {index}/{len(targets)}: {target.get('name') or url} ===")
+        target_settings = resolve_settings(config, args, target.get("scraper"))
+        if not run_target(target_settings, url, output_file):
+            failed.append(index)
+
+    print(f"\n📊 Успешно: {len(targets) - len(failed)}/{len(targets)}")
+    if failed:
+        print(f"❌ С ошибками: {', '.join(map(str, failed))}")
+        return 1
+    return 0
+
+
+def command_reparse(args, config, settings):
+    parser = PriceListParser(
+        fast_mode=settings["fast_mode"],
+        batch_size=settings["batch_size"],
+        start_driver=False,
+    )
+    duplicates_by_file = {}
+    for path in args.html_files:
+        print(f"\nРазбираем {path}")
+        # Дубли ищем в пределах файла: разные файлы - разные снимки страницы
+        parser.reset_dedup()
+        first_row = len(parser.data)
+        parser.parse_page_source(SnapshotArchive.read_page_source(path))
+        duplicates_by_file[path] = sum(parser.duplicates_by_container.values())
+        # Без источника строки разных снимков в общем CSV не различить
+        for row in parser.data[first_row:]:
+            row["source"] = path
+
+    parser.reset_dedup()
+    parser.show_parsing_stats()
+    if any(duplicates_by_file.values()):
+        print("Отброшено дублей по файлам:")
+        for path, count in duplicates_by_file.items():
+            print(f"  - {path}: {count}")
+    output_file = args.output or settings["output"]
+    return 0 if parser.save_to_csv(output_file, SOURCE_CSV_FIELDS) else 1
+
+
+def reparse_snapshot(task):
+    """Разбор одного снимка в дочернем процессе пула"""
+    digest, path, fast_mode = task
+    parser = PriceListParser(fast_mode=fast_mode, start_driver=False)
+    try:
+        # Построчный вывод парсера из тысяч процессов только мешает
+        with contextlib.redirect_stdout(io.StringIO()):
+            parser.parse_page_source(SnapshotArchive.read_page_source(path))
+    except Exception as e:
+        return digest, [], 0, str(e)
+    return digest, parser.data, sum(parser.duplicates_by_container.values()), None
+
+
+def command_reprocess(args, config, settings):
+    if not settings["archive_dir"]:
+        print("Не указан каталог архива")
+        return 2
+
+    archive = SnapshotArchive(settings["archive_dir"])
+    records_by_digest = {}
+    for record in archive.records():
+        records_by_digest.setdefault(record["sha256"], []).append(record)
+
+    if not records_by_digest:
+        print(f"Архив пуст: {archive.root}")
+        return 1
+
+    # Одинаковый HTML разбираем один раз, строки пишем для каждой записи индекса
+    tasks = [
+        (
+            digest,
+            os.path.join(archive.root, records[0]["object"]),
+            settings["fast_mode"],
+        )
+        for digest, records in records_by_digest.items()
+    ]
+    workers = args.workers or os.cpu_count() or 1
+    chunksize = max(1, min(16, len(tasks) // (workers * 4)))
+    output_file = args.output or settings["output"]
+
+    reprocess_timer = Timer("Переобработка архива")
+    reprocess_timer.start()
+    print(f"🔄 Снимков: {len(tasks)}, процессов: {workers}")
+
+    total_rows = 0
+    total_duplicates = 0
+    errors = 0
+    with open(output_file, "w", newline="", encoding="utf-8") as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=SNAPSHOT_CSV_FIELDS)
+        writer.writeheader()
+
+        with multiprocessing.Pool(workers) as pool:
+            results = pool.imap_unordered(reparse_snapshot, tasks, chunksize=chunksize)
+            for done, (digest, rows, duplicates, error) in enumerate(results, 1):
+                if error:
+                    errors += 1
+                    print(f"  ❌ {digest[:12]}: {error[:80]}")
+
+                for record in records_by_digest[digest]:
+                    for row in rows:
+                        writer.writerow(
+                            {
+                                "snapshot": digest,
+                                "captured_at": record.get("captured_at", ""),
+                                "url": record.get("url", ""),
+                                **row,
+                            }
+                        )
+                        total_rows += 1
+                total_duplicates += duplicates
+
+                if done % 100 == 0 or done == len(tasks):
+                    print(f"  📈 Обработано снимков: {done}/{len(tasks)}")
+
+    total_time = reprocess_timer.stop()
+    print(f"\n=== ИТОГИ ПЕРЕОБРАБОТКИ ===")
+    print(f"📋 Записано строк: {total_rows}")
+    print(f"♻️ Отброшено дублей: {total_duplicates}")
+    print(f"❌ Снимков с ошибками: {errors}")
+    print(f"📊 Скорость: {len(tasks) / max(total_time, 1e-9):.2f} снимков/сек")
+    print(f"📁 Результат: {output_file}")
+    return 1 if errors == len(tasks) else 0
+
+
+def command_stats(args, config, settings):
+    parser = PriceListParser(start_driver=False)
+    for path in args.csv_files:
+        parser.load_from_csv(path)
+
+    if not parser.data:
+        print("Нет данных для статистики")
+        return 1
+
+    parser.show_parsing_stats()
+    return 0
+
+
+def build_arg_parser():
+    arg_parser = argparse.ArgumentParser(
+        description="Парсер прайс-листа YCLIENTS",
+    )
+    arg_parser.add_argument(
+        "-c", "--config", help="Файл конфигурации (.toml, .yaml, .yml)"
+    )
+    subparsers = arg_parser.add_subparsers(dest="command")
+
+    def add_subparser(name, **kwargs):
+        subparser = subparsers.add_parser(name, **kwargs)
+        # -c принимаем и после подкоманды, не затирая значение до нее
+        subparser.add_argument(
+            "-c",
+            "--config",
+            default=argparse.SUPPRESS,
+            help="Файл конфигурации (.toml, .yaml, .yml)",
+        )
+        return subparser
+
+    def add_tuning_arguments(subparser):
+        subparser.add_argument(
+            "--headless",
+            action=argparse.BooleanOptionalAction,
+            default=None,
+            help="Запуск браузера без окна",
+        )
+        subparser.add_argument(
+            "--fast",
+            dest="fast_mode",
+            action=argparse.BooleanOptionalAction,
+            default=None,
+            help="Режим быстрого парсинга",
+        )
+        subparser.add_argument(
+            "--page-timeout", type=int, help="Таймаут ожидания контейнеров, сек"
+        )
+        subparser.add_argument(
+            "--batch-size", type=int, help="Размер пакета контейнеров"
+        )
+        subparser.add_argument(
+            "--archive-dir", help="Сохранять снимки page_source в этот каталог"
+        )
+        subparser.add_argument(
+            "--compression",
+            choices=["auto", "zstd", "gzip"],
+            help="Сжатие снимков",
+        )
+        subparser.add_argument(
+            "--profile",
+            choices=sorted(LAUNCH_PROFILES),
+            help="Профиль запуска Chrome (low - экономия памяти)",
+        )
+        subparser.add_argument(
+            "--memory-budget",
+            dest="memory_budget_mb",
+            type=int,
+            help="Бюджет памяти Chrome, МБ (превышение - перезапуск)",
+        )
+        subparser.add_argument(
+            "--cpu-budget",
+            dest="cpu_budget_percent",
+            type=int,
+            help="Бюджет CPU Chrome, %% (превышение - притормаживание)",
+        )
+        subparser.add_argument(
+            "--restart-low",
+            action=argparse.BooleanOptionalAction,
+            default=None,
+            help="При превышении бюджета памяти перезапустить браузер в профиле low",
+        )
+
+    scrape = add_subparser("scrape", help="Спарсить одну страницу")
+    scrape.add_argument("--url", help="Адрес страницы с услугами")
+    scrape.add_argument("-o", "--output", help="CSV файл для результата")
+    add_tuning_arguments(scrape)
+    scrape.set_defaults(handler=command_scrape)
+
+    batch = add_subparser("batch", help="Спарсить все цели из конфига")
+    add_tuning_arguments(batch)
+    batch.set_defaults(handler=command_batch)
+
+    reparse = add_subparser(
+        "reparse", help="Повторно разобрать сохраненный HTML без браузера"
+    )
+    reparse.add_argument(
+        "html_files", nargs="+", help="Файлы с page_source (.html, .gz, .zst)"
+    )
+    reparse.add_argument("-o", "--output", help="CSV файл для результата")
+    reparse.add_argument(
+        "--fast",
+        dest="fast_mode",
+        action=argparse.BooleanOptionalAction,
+        default=None,
+        help="Режим быстрого парсинга",
+    )
+    reparse.set_defaults(handler=command_reparse)
+
+    reprocess = add_subparser(
+        "reprocess", help="Параллельно разобрать все снимки из архива"
+    )
+    reprocess.add_argument(
+        "archive_dir", nargs="?", help="Каталог архива (по умолчанию из конфига)"
+    )
+    reprocess.add_argument("-o", "--output", help="CSV файл для результата")
+    reprocess.add_argument(
+        "-j", "--workers", type=int, help="Число процессов (по умолчанию все ядра)"
+    )
+    reprocess.add_argument(
+        "--fast",
+        dest="fast_mode",
+        action=argparse.BooleanOptionalAction,
+        default=None,
+        help="Режим быстрого парсинга",
+    )
+    reprocess.set_defaults(handler=command_reprocess)
+
+    stats = add_subparser("stats", help="Статистика по CSV файлам")
+    stats.add_argument("csv_files", nargs="+", help="CSV файлы с услугами")
+    stats.set_defaults(handler=command_stats)
+
+    return arg_parser
+
+
+def interactive_main():
     """Главная функция с выбором режима"""
     print("=== ОПТИМИЗИРОВАННЫЙ ПАРСЕР ПРАЙС-ЛИСТА ===")
     print("Выберите режим работы:")
@@ -723,5 +1761,35 @@ def main():
         print(f"\n❌ Парсинг завершился с ошибками")
 
 
+def main(argv=None):
+    """Точка входа командной строки"""
+    if argv is None:
+        argv = sys.argv[1:]
+
+    # Без аргументов в терминале сохраняем интерактивный выбор режима
+    if not argv and sys.stdin.isatty():
+        interactive_main()
+        return 0
+
+    args = build_arg_parser().parse_args(argv)
+    if args.command is None:
+        args = build_arg_parser().parse_args([*argv, "scrape"])
+
+    try:
+        config = load_config(args.config)
+        settings = resolve_settings(config, args)
+        # Настройки целей проверяем заранее, чтобы batch не падал на середине
+        for target in config.get("targets") or []:
+            resolve_settings(config, args, target.get("scraper"))
+    except (OSError, ValueError, RuntimeError) as e:
+        print(f"Ошибка чтения конфига: {e}")
+        return 2
+
+    startup_ms = (time.perf_counter() - _STARTUP_STARTED) * 1000
+    print(f"⚡ Время запуска: {startup_ms:.1f} мс")
+
+    return args.handler(args, config, settings)
+
+
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,101 @@
+import csv
+import os
+
+import pytest
+
+import main
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "price_list.html")
+
+
+def parse_args(*argv):
+    return main.build_arg_parser().parse_args(list(argv))
+
+
+def test_load_config_toml(tmp_path):
+    path = tmp_path / "config.toml"
+    path.write_text(
+        '[scraper]\nheadless = false\n\n[[targets]]\nurl = "https://a"\n',
+        encoding="utf-8",
+    )
+    config = main.load_config(str(path))
+    assert config["scraper"] == {"headless": False}
+    assert config["targets"] == [{"url": "https://a"}]
+
+
+def test_load_config_yaml(tmp_path):
+    pytest.importorskip("yaml")
+    path = tmp_path / "config.yaml"
+    path.write_text("scraper:\n  batch_size: 3\n", encoding="utf-8")
+    assert main.load_config(str(path)) == {"scraper": {"batch_size": 3}}
+
+
+def test_load_config_malformed_yaml_is_value_error(tmp_path):
+    pytest.importorskip("yaml")
+    path = tmp_path / "config.yaml"
+    path.write_text("scraper: [bad\n", encoding="utf-8")
+    with pytest.raises(ValueError):
+        main.load_config(str(path))
+
+
+def test_load_config_rejects_unknown_format(tmp_path):
+    path = tmp_path / "config.ini"
+    path.write_text("", encoding="utf-8")
+    with pytest.raises(ValueError):
+        main.load_config(str(path))
+
+
+def test_resolve_settings_precedence():
+    config = {"scraper": {"headless": False, "batch_size": 3, "page_timeout": 15}}
+    args = parse_args("batch", "--headless")
+    settings = main.resolve_settings(
+        config, args, {"headless": False, "page_timeout": 40}
+    )
+    assert settings["headless"] is True
+    assert settings["page_timeout"] == 40
+    assert settings["batch_size"] == 3
+    assert settings["fast_mode"] is main.DEFAULT_SETTINGS["fast_mode"]
+
+
+def test_config_option_accepted_after_subcommand():
+    assert parse_args("scrape", "-c", "after.toml").config == "after.toml"
+    assert parse_args("-c", "before.toml", "scrape").config == "before.toml"
+    assert parse_args("scrape").config is None
+
+
+@pytest.mark.parametrize(
+    "argv, expected_url, expected_output",
+    [
+        ([], "https://a", "a.csv"),
+        (["--url", "https://b"], "https://b", "price_list.csv"),
+        (["--url", "https://b", "-o", "b.csv"], "https://b", "b.csv"),
+    ],
+)
+def test_scrape_uses_target_output_only_with_target_url(
+    monkeypatch, argv, expected_url, expected_output
+):
+    calls = []
+    monkeypatch.setattr(
+        main, "run_target", lambda settings, url, output: calls.append((url, output))
+    )
+    config = {"targets": [{"url": "https://a", "output": "a.csv"}]}
+    args = parse_args("scrape", *argv)
+    main.command_scrape(args, config, main.resolve_settings(config, args))
+    assert calls == [(expected_url, expected_output)]
+
+
+def test_reparse_deduplicates_within_each_file(tmp_path):
+    pytest.importorskip("bs4")
+    second = tmp_path / "second.html"
+    with open(FIXTURE, encoding="utf-8") as html_file:
+        second.write_text(html_file.read(), encoding="utf-8")
+    output = tmp_path / "out.csv"
+    args = parse_args("reparse", FIXTURE, str(second), "-o", str(output))
+    assert main.command_reparse(args, {}, main.resolve_settings({}, args)) == 0
+
+    with open(output, newline="", encoding="utf-8") as csvfile:
+        reader = csv.DictReader(csvfile)
+        assert reader.fieldnames == main.SOURCE_CSV_FIELDS
+        rows = list(reader)
+    assert [row["source"] for row in rows] == [FIXTURE] * 6 + [str(second)] * 6
+    assert len({(row["source"], row["service"]) for row in rows}) == 12
@@ -0,0 +1,65 @@
+import os
+
+import pytest
+
+from main import PriceListParser
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "price_list.html")
+
+
+def make_service(**overrides):
+    service = {
+        "category": "Стрижки",
+        "service": "Мужская стрижка",
+        "duration": "60 мин",
+        "description": "",
+        "price": "1500 ₽",
+    }
+    service.update(overrides)
+    return service
+
+
+def test_dedup_key_normalizes_case_and_whitespace():
+    key = PriceListParser.make_dedup_key(make_service())
+    assert key == PriceListParser.make_dedup_key(
+        make_service(service="  мужская   СТРИЖКА ", price="1500  ₽")
+    )
+
+
+def test_dedup_key_ignores_description():
+    key = PriceListParser.make_dedup_key(make_service())
+    assert key == PriceListParser.make_dedup_key(make_service(description="Текст"))
+
+
+@pytest.mark.parametrize("field", ["category", "service", "price", "duration"])
+def test_dedup_key_depends_on_key_fields(field):
+    key = PriceListParser.make_dedup_key(make_service())
+    assert key != PriceListParser.make_dedup_key(make_service(**{field: "другое"}))
+
+
+def test_register_service_rejects_repeats():
+    parser = PriceListParser(start_driver=False)
+    assert parser.register_service(make_service())
+    assert not parser.register_service(make_service(service="мужская стрижка"))
+    assert parser.register_service(make_service(service="Детская стрижка"))
+
+
+def test_parse_page_source_drops_nested_and_repeated_cards():
+    pytest.importorskip("bs4")
+    parser = PriceListParser(start_driver=False)
+    with open(FIXTURE, encoding="utf-8") as html_file:
+        assert parser.parse_page_source(html_file.read())
+
+    rows = [(row["category"], row["service"], row["price"]) for row in parser.data]
+    assert rows == [
+        ("Стрижки", "Мужская стрижка", "1500 ₽"),
+        ("Маникюр", "Покрытие", "от 900 ₽"),
+        ("Стрижки", "Детская стрижка", "900 ₽"),
+        ("Брови", "Коррекция", "500 ₽"),
+        ("Брови", "Окрашивание", "700 ₽"),
+        ("Брови", "Ламинирование", "1800 ₽"),
+    ]
+    # Повтор внутри контейнера и повтор из другого контейнера
+    assert parser.duplicates_by_container == {0: 1, 2: 1}
+    # Обертка над карточкой с названием; поля цены и времени не считаются
+    assert parser.nested_by_container == {1: 1, 3: 1}
@@ -0,0 +1,44 @@
+import pytest
+
+pytest.importorskip("bs4")
+
+from main import By, HtmlElement
+
+
+def test_text_splits_block_elements_into_lines():
+    root = HtmlElement.from_page_source(
+        "<div><h4>Покрытие</h4><span>от 900</span> <b>₽</b><p>45   мин</p></div>"
+    )
+    assert root.text == "Покрытие\nот 900 ₽\n45 мин"
+
+
+def test_text_skips_scripts_styles_and_comments():
+    root = HtmlElement.from_page_source(
+        "<head><title>Т</title><style>.a{}</style></head>"
+        "<body><!-- скрыто --><script>var x = 1;</script><p>Видно</p></body>"
+    )
+    assert root.text == "Видно"
+
+
+def test_find_element_supports_selenium_strategies():
+    root = HtmlElement.from_page_source('<div class="price">1500 ₽</div><h3>Т</h3>')
+    assert root.find_element(By.CLASS_NAME, "price").text == "1500 ₽"
+    assert root.find_element(By.TAG_NAME, "h3").text == "Т"
+    assert len(root.find_elements(By.CSS_SELECTOR, "div.price")) == 1
+    with pytest.raises(LookupError):
+        root.find_element(By.CSS_SELECTOR, ".missing")
+
+
+def test_drop_nested_keeps_innermost_named_cards():
+    root = HtmlElement.from_page_source(
+        '<div class="cards-list" id="wrapper">'
+        '<div class="a-card" id="first"><h4>А</h4><div class="card-price">1</div></div>'
+        '<div class="a-card" id="second"><h4>Б</h4></div>'
+        "</div>"
+        '<div class="c-card" id="single"><h4>В</h4></div>'
+        '<div class="d-card" id="empty"></div>'
+    )
+    cards = root.find_elements(By.CSS_SELECTOR, "div[class*='card']")
+    kept, nested = HtmlElement.drop_nested(cards, "h4")
+    assert [card.node["id"] for card in kept] == ["first", "second", "single"]
+    assert nested == 1
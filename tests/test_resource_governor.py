@@ -0,0 +1,102 @@
+import pytest
+
+import main
+from main import PriceListParser, ResourceGovernor
+
+
+class FakeDriver:
+    def __init__(self):
+        self.cdp_commands = []
+
+    def get(self, url):
+        pass
+
+    def execute_cdp_cmd(self, command, params):
+        self.cdp_commands.append((command, params))
+
+
+def make_parser(monkeypatch, profile="default", restart_low=True, **governor_kwargs):
+    parser = PriceListParser(
+        start_driver=False, profile=profile, restart_low=restart_low
+    )
+    parser.driver = FakeDriver()
+    parser.governor = ResourceGovernor(throttle_delay=0, **governor_kwargs)
+    monkeypatch.setattr(parser, "wait_for_page_load", lambda: True)
+    return parser
+
+
+def test_over_budget_page_restarts_once_into_low_profile(monkeypatch):
+    parser = make_parser(monkeypatch, memory_budget_mb=100)
+    parser.governor.current_rss_mb = 500
+    profiles = []
+
+    def restart_driver():
+        profiles.append(parser.profile)
+        parser.governor.restarts += 1
+
+    monkeypatch.setattr(parser, "restart_driver", restart_driver)
+    assert parser.load_page()
+    assert profiles == ["low"]
+
+
+@pytest.mark.parametrize("profile, restart_low", [("low", True), ("default", False)])
+def test_over_budget_page_without_restart(monkeypatch, profile, restart_low):
+    parser = make_parser(
+        monkeypatch, profile=profile, restart_low=restart_low, memory_budget_mb=100
+    )
+    parser.governor.current_rss_mb = 500
+    monkeypatch.setattr(parser, "restart_driver", pytest.fail)
+    assert parser.load_page()
+    assert parser.profile == profile
+
+
+def test_restart_low_flag_overrides_config():
+    args = main.build_arg_parser().parse_args(["batch", "--no-restart-low"])
+    config = {"scraper": {"restart_low": True}}
+    assert main.resolve_settings(config, args)["restart_low"] is False
+
+
+def test_cpu_over_budget_throttles_browser_until_recovered(monkeypatch):
+    parser = make_parser(monkeypatch, cpu_budget_percent=50)
+
+    parser.governor.current_cpu_percent = 90
+    parser.resource_checkpoint()
+    parser.resource_checkpoint()
+    parser.governor.current_cpu_percent = 10
+    parser.resource_checkpoint()
+
+    assert parser.driver.cdp_commands == [
+        ("Emulation.setCPUThrottlingRate", {"rate": 2}),
+        ("Emulation.setCPUThrottlingRate", {"rate": 1}),
+    ]
+    assert parser.governor.throttles == 2
+
+
+def test_report_runs_when_parsing_fails(monkeypatch, capsys):
+    parser = make_parser(monkeypatch)
+    parser.governor.peak_rss_mb = 321
+    monkeypatch.setattr(parser, "load_page", lambda: False)
+    monkeypatch.setattr(FakeDriver, "quit", lambda self: None, raising=False)
+
+    assert not parser.run()
+    assert "321.0 МБ" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize("scraper", [{"profile": "tiny"}, {"compression": "brotli"}])
+def test_resolve_settings_rejects_unknown_values(scraper):
+    args = main.build_arg_parser().parse_args(["batch"])
+    with pytest.raises(ValueError):
+        main.resolve_settings({"scraper": scraper}, args)
+    with pytest.raises(ValueError):
+        main.resolve_settings({}, args, scraper)
+
+
+def test_invalid_target_settings_exit_before_batch(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "run_target", pytest.fail)
+    path = tmp_path / "config.toml"
+    path.write_text(
+        '[[targets]]\nurl = "https://a"\n\n'
+        '[[targets]]\nurl = "https://b"\nscraper = { profile = "tiny" }\n',
+        encoding="utf-8",
+    )
+    assert main.main(["-c", str(path), "batch"]) == 2
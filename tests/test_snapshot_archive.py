@@ -0,0 +1,111 @@
+import gzip
+import os
+
+import pytest
+
+import main
+from main import PriceListParser, SnapshotArchive
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "price_list.html")
+
+
+def read_fixture():
+    with open(FIXTURE, encoding="utf-8") as html_file:
+        return html_file.read()
+
+
+def test_save_and_read_gzip_round_trip(tmp_path):
+    archive = SnapshotArchive(str(tmp_path), compression="gzip")
+    page_source = read_fixture()
+
+    record, is_new = archive.save(page_source, url="https://a")
+
+    assert is_new
+    assert record["url"] == "https://a"
+    assert record["size"] == len(page_source.encode("utf-8"))
+    path = os.path.join(archive.root, record["object"])
+    assert path.endswith(record["sha256"] + ".html.gz")
+    with open(path, "rb") as snapshot_file:
+        assert gzip.decompress(snapshot_file.read()).decode("utf-8") == page_source
+    assert SnapshotArchive.read_page_source(path) == page_source
+
+
+def test_identical_content_is_stored_once(tmp_path):
+    archive = SnapshotArchive(str(tmp_path), compression="gzip")
+
+    first, first_is_new = archive.save("<html>1</html>", url="https://a")
+    second, second_is_new = archive.save("<html>1</html>", url="https://b")
+    third, third_is_new = archive.save("<html>2</html>", url="https://a")
+
+    assert (first_is_new, second_is_new, third_is_new) == (True, False, True)
+    assert first["object"] == second["object"] != third["object"]
+    assert [record["url"] for record in archive.records()] == [
+        "https://a",
+        "https://b",
+        "https://a",
+    ]
+    objects = [files for _, _, files in os.walk(tmp_path / "objects")]
+    assert sum(len(files) for files in objects) == 2
+
+
+def test_records_of_missing_archive_are_empty(tmp_path):
+    assert list(SnapshotArchive(str(tmp_path / "missing")).records()) == []
+
+
+def test_records_skip_damaged_lines(tmp_path, capsys):
+    archive = SnapshotArchive(str(tmp_path), compression="gzip")
+    archive.save("<html>1</html>", url="https://a")
+    with open(archive.index_path, "a", encoding="utf-8") as index_file:
+        index_file.write('{"url": "https://b"}\n[1, 2]\n{"sha256": "ab", "obj')
+
+    assert [record["url"] for record in archive.records()] == ["https://a"]
+    assert capsys.readouterr().out.count("поврежденная запись") == 3
+
+
+def test_unknown_compression_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        SnapshotArchive(str(tmp_path), compression="brotli")
+
+
+def test_read_page_source_accepts_plain_html():
+    assert SnapshotArchive.read_page_source(FIXTURE) == read_fixture()
+
+
+def test_reparse_snapshot_matches_direct_parse(tmp_path):
+    pytest.importorskip("bs4")
+    archive = SnapshotArchive(str(tmp_path), compression="gzip")
+    record, _ = archive.save(read_fixture())
+    path = os.path.join(archive.root, record["object"])
+
+    digest, rows, duplicates, error = main.reparse_snapshot(
+        (record["sha256"], path, True)
+    )
+
+    parser = PriceListParser(start_driver=False)
+    parser.parse_page_source(read_fixture())
+    assert (digest, error) == (record["sha256"], None)
+    assert rows == parser.data
+    assert duplicates == 2
+
+
+def test_snapshot_is_taken_after_dynamic_content(tmp_path, monkeypatch):
+    class FakeDriver:
+        page_source = "<html>до догрузки</html>"
+
+        def find_elements(self, by, value):
+            return []
+
+    parser = PriceListParser(start_driver=False, archive_dir=str(tmp_path))
+    parser.archive.compression = "gzip"
+    parser.driver = FakeDriver()
+
+    def wait_for_dynamic_content():
+        parser.driver.page_source = "<html>после догрузки</html>"
+        return 0
+
+    monkeypatch.setattr(parser, "wait_for_dynamic_content", wait_for_dynamic_content)
+    parser.parse_services()
+
+    (record,) = list(parser.archive.records())
+    path = os.path.join(parser.archive.root, record["object"])
+    assert SnapshotArchive.read_page_source(path) == "<html>после догрузки</html>"